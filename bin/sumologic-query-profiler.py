@@ -24,21 +24,27 @@ __version__ = 1.40
 __author__ = "Wayne Schmidt (wschmidt@sumologic.com)"
 
 ### beginning ###
+import csv
 import json
 import os
 import sys
 import argparse
-import http
+import functools
+import hashlib
 import re
 import time
-import random
-import multiprocessing
+import threading
+import concurrent.futures
 import pathlib
 import requests
 from requests.adapters import HTTPAdapter
+from requests.cookies import RequestsCookieJar
 from requests.packages.urllib3.util.retry import Retry
-import pandas
-import boto3
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 sys.dont_write_bytecode = 1
 
@@ -60,7 +66,16 @@ PARSER.add_argument("-o", metavar='<fmt>', default="csv", dest='OUT_FORMAT', \
 PARSER.add_argument("-d", metavar='<outdir>', default="/var/tmp/sumoquery", dest='OUTPUTDIR', \
                     help="set query output directory")
 PARSER.add_argument("-s", metavar='<sleeptime>', default=3, dest='SLEEPTIME', \
-                    help="set sleep time to check results")
+                    help="set longest sleep time between checking results")
+PARSER.add_argument("-w", metavar='<workers>', type=int, default=1, dest='WORKERS', \
+                    help="set number of workers")
+PARSER.add_argument("-c", action='store_true', dest='CLEANUP', \
+                    help="rerun any pending queries left over")
+PARSER.add_argument("--cache-ttl", metavar='<cachettl>', type=int, \
+                    default=7 * 24 * 60 * 60, dest='CACHETTL', \
+                    help="set cached results lifetime in seconds")
+PARSER.add_argument("--no-cache", action='store_true', dest='NOCACHE', \
+                    help="bypass cached query results")
 PARSER.add_argument("-v", type=int, default=0, metavar='<verbose>', \
                     dest='VERBOSE', help="increase verbosity")
 
@@ -75,6 +90,9 @@ os.makedirs(PENDING, exist_ok=True)
 OUTPUTS = os.path.join( OUTPUTBASE, 'outputs' )
 os.makedirs(OUTPUTS, exist_ok=True)
 
+CACHES = os.path.join( OUTPUTBASE, 'cache' )
+os.makedirs(CACHES, exist_ok=True)
+
 SEC_M = 1000
 MIN_S = 60
 HOUR_M = 60
@@ -83,6 +101,7 @@ WEEK_D = 7
 
 LIMIT = 10000
 LONGQUERY_LIMIT = 100
+MAX_INFLIGHT = 32
 
 DEFAULT_QUERY = '''
 _index=sumologic_volume
@@ -112,28 +131,43 @@ TIME_TABLE["h"] = TIME_TABLE["m"] * HOUR_M
 TIME_TABLE["d"] = TIME_TABLE["h"] * DAY_H
 TIME_TABLE["w"] = TIME_TABLE["d"] * WEEK_D
 
-TIME_PARAMS = {}
+TAILOR_RE = re.compile(r'\{\{(deployment|org_id|longquery_limit_stmt|key)\}\}')
+
+RANGE_RE = re.compile(r'(\d+)([smhdw])')
+
+APISESSION = None
+
+ENDPOINT_CACHE = {}
 
 TARGETS = ARGS.MY_TARGET
 
-if ARGS.MY_APIKEY:
-    if "aws:ssm:" in ARGS.MY_APIKEY:
-        VENDOR, METHOD, REGION, TOKENS = ARGS.MY_APIKEY.split(':')
+def resolve_credentials(apikey):
+    """
+    Resolve the api key pair, fetching it from the AWS SSM parameter
+    store when asked. boto3 is imported here so only invocations that
+    actually use SSM pay its import cost, and the resolved pair is
+    shared by every worker through the module globals
+    """
+    if "aws:ssm:" in apikey:
+        import boto3
+        vendor, method, region, tokens = apikey.split(':')
         if ARGS.VERBOSE > 7:
-            print(f'VENDOR: {VENDOR}')
-            print(f'METHOD: {METHOD}')
-            print(f'REGION: {REGION}')
-            print(f'TOKENS: {TOKENS}')
+            print(f'VENDOR: {vendor}')
+            print(f'METHOD: {method}')
+            print(f'REGION: {region}')
+            print(f'TOKENS: {tokens}')
 
-        ssmobject = boto3.client(METHOD, region_name=REGION)
+        ssmobject = boto3.client(method, region_name=region)
         ssmresponse = ssmobject.get_parameters(
-            Names=[ TOKENS ],
+            Names=[ tokens ],
             WithDecryption=True
         )
-        TOKEN_CONTENTS = ssmresponse['Parameters'][0]['Value']
-        (MY_APINAME, MY_APISECRET) = TOKEN_CONTENTS.split(':')
-    else:
-        (MY_APINAME, MY_APISECRET) = ARGS.MY_APIKEY.split(':')
+        token_contents = ssmresponse['Parameters'][0]['Value']
+        return token_contents.split(':')
+    return apikey.split(':')
+
+if ARGS.MY_APIKEY:
+    (MY_APINAME, MY_APISECRET) = resolve_credentials(ARGS.MY_APIKEY)
 
     os.environ['SUMO_UID'] = MY_APINAME
     os.environ['SUMO_KEY'] = MY_APISECRET
@@ -153,7 +187,7 @@ def main():
     Once done, then issue the command required
     """
 
-    apisession = SumoApiClient(SUMO_UID, SUMO_KEY)
+    apisession = get_apisession()
 
     if ARGS.CLEANUP:
         query_targets = os.listdir(PENDING)
@@ -169,16 +203,23 @@ def main():
     else:
         worker_manager(query_targets)
 
-def worker_task(inputs):
+def get_apisession():
+    """
+    Return the shared SumoApiClient, building it only on first use
+    so every worker in a process reuses one client and session
+    """
+    global APISESSION
+    if APISESSION is None:
+        APISESSION = SumoApiClient(SUMO_UID, SUMO_KEY)
+    return APISESSION
+
+def worker_task(apisession, query_list, time_params, inputs):
     """
     This is the worker task function
     """
-    apisession = SumoApiClient(SUMO_UID, SUMO_KEY)
-    query_list = collect_queries()
-    time_params = calculate_range()
-    workerpid = multiprocessing.current_process()
+    workername = threading.current_thread().name
     if ARGS.VERBOSE > 5:
-        print(f'SUMOQUERY.worker: {workerpid}')
+        print(f'SUMOQUERY.worker: {workername}')
         print(f'SUMOQUERY.worktarget: {inputs}')
 
     query_targets = []
@@ -189,10 +230,20 @@ def worker_task(inputs):
 def worker_manager(query_targets):
     """
     This is the manager function to handle mapping tasks to workers
+    The client, query list and time range are built once here and
+    shared by every worker thread, so the keep-alive pool stays warm
+    and the query files are read from disk only once
     """
+    apisession = get_apisession()
+    query_list = collect_queries()
+    time_params = calculate_range()
+    for query_item in query_list:
+        collect_contents(query_item)
+
     worker_list = query_targets
-    with multiprocessing.Pool(ARGS.WORKERS) as task_queue:
-        task_queue.map(worker_task, worker_list)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=ARGS.WORKERS) as executor:
+        worker = functools.partial(worker_task, apisession, query_list, time_params)
+        list(executor.map(worker, worker_list))
 
 def prepare_placeholders(query_targets):
     """
@@ -206,30 +257,46 @@ def prepare_placeholders(query_targets):
 def process_request(apisession, query_targets, query_list, time_params):
     """
     perform the queries and process the output
+    Each target and query pair becomes a concurrent job, so the
+    wall clock cost is the slowest job rather than the sum of all jobs
     """
 
     prepare_placeholders(query_targets)
 
+    query_jobs = []
     for query_target in query_targets:
-
         querycounter = 1
-
-        jobholder = os.path.join( PENDING, query_target )
-
         for query_item in query_list:
-            query_data = collect_contents(query_item)
-            query_data = tailor_queries(query_data, query_target)
-            if ARGS.VERBOSE > 7:
-                print(f'SUMOQUERY.query_item: {query_item}')
-                print(f'SUMOQUERY.query_data: {query_data}')
-            header_output = run_sumo_query(apisession, query_data, time_params)
-            write_query_output(header_output, query_target, querycounter)
+            query_jobs.append((query_target, query_item, querycounter))
             querycounter += 1
-            time.sleep(random.randint(0,MY_SLEEP))
-        time.sleep(random.randint(0,MY_SLEEP))
 
+    if query_jobs:
+        max_workers = min(len(query_jobs), MAX_INFLIGHT)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [ executor.submit(process_query_job, apisession, query_job, time_params) \
+                for query_job in query_jobs ]
+            for future in futures:
+                future.result()
+
+    for query_target in query_targets:
+        jobholder = os.path.join( PENDING, query_target )
         os.remove(jobholder)
 
+def process_query_job(apisession, query_job, time_params):
+    """
+    run a single target and query pair, and then write out the results
+    """
+
+    (query_target, query_item, querycounter) = query_job
+
+    query_data = collect_contents(query_item)
+    query_data = tailor_queries(query_data, query_target)
+    if ARGS.VERBOSE > 7:
+        print(f'SUMOQUERY.query_item: {query_item}')
+        print(f'SUMOQUERY.query_data: {query_data}')
+    output_chunks = run_sumo_query(apisession, query_data, time_params, query_target)
+    write_query_output(output_chunks, query_target, querycounter)
+
 def resolve_targets(target_org_list):
     """
     Resolve targets based on input
@@ -245,9 +312,11 @@ def resolve_targets(target_org_list):
 
     return query_targets
 
-def write_query_output(header_output, query_target, query_number):
+def write_query_output(output_chunks, query_target, query_number):
     """
     This is a wrapper for writing out the contents of a file
+    The chunks are written as they arrive so only one page of
+    records is ever held in memory
     """
 
     ext_sep = '.'
@@ -263,9 +332,9 @@ def write_query_output(header_output, query_target, query_number):
     if ARGS.VERBOSE > 3:
         print(f'SUMOQUERY.outputfile: {output_target}')
 
-    with open(output_target, "w", encoding='utf8') as file_object:
-        file_object.write(header_output + '\n' )
-        file_object.close()
+    with open(output_target, "w", encoding='utf8', buffering=1024*1024) as file_object:
+        for output_chunk in output_chunks:
+            file_object.write(output_chunk + EOL_SEP)
 
 def tailor_queries(query_item, query_target):
     """
@@ -277,9 +346,7 @@ def tailor_queries(query_item, query_target):
     replacements['{{org_id}}'] = query_target.split('_')[1]
     replacements['{{longquery_limit_stmt}}'] = str(LONGQUERY_LIMIT)
     replacements['{{key}}'] = query_target
-    for sub_key, sub_value in replacements.items():
-        query_item = query_item.replace(sub_key, sub_value)
-    return query_item
+    return TAILOR_RE.sub(lambda match: replacements[match.group(0)], query_item)
 
 def calculate_range():
     """
@@ -290,28 +357,38 @@ def calculate_range():
     if ARGS.MY_RANGE:
         if ":" in ARGS.MY_RANGE:
             start_marker, final_marker = ARGS.MY_RANGE.split(":")
-            start_number = re.match(r'\d+', start_marker.replace('-', ''))
-            start_period = start_marker.replace(start_number.group(), '')
-            time_to = NOW_TIME - (int(start_number.group()) * int(TIME_TABLE[start_period]))
-            final_number = re.match(r'\d+', final_marker.replace('-', ''))
-            final_period = final_marker.replace(final_number.group(), '')
-            time_from = time_to - (int(final_number.group()) * int(TIME_TABLE[final_period]))
+            start_number, start_period = RANGE_RE.match(start_marker.lstrip('-')).groups()
+            time_to = NOW_TIME - (int(start_number) * int(TIME_TABLE[start_period]))
+            final_number, final_period = RANGE_RE.match(final_marker.lstrip('-')).groups()
+            time_from = time_to - (int(final_number) * int(TIME_TABLE[final_period]))
         else:
             time_to = NOW_TIME
-            final_number = re.match(r'\d+', ARGS.MY_RANGE.replace('-', ''))
-            final_period = ARGS.MY_RANGE.replace(final_number.group(), '')
-            time_from = time_to - (int(final_number.group()) * int(TIME_TABLE[final_period]))
+            final_number, final_period = RANGE_RE.match(ARGS.MY_RANGE.lstrip('-')).groups()
+            time_from = time_to - (int(final_number) * int(TIME_TABLE[final_period]))
 
-    TIME_PARAMS["time_to"] = time_to
-    TIME_PARAMS["time_from"] = time_from
-    TIME_PARAMS["time_zone"] = 'UTC'
-    TIME_PARAMS["by_receipt_time"] = False
-    return TIME_PARAMS
+    time_params = {}
+    time_params["time_to"] = time_to
+    time_params["time_from"] = time_from
+    time_params["time_zone"] = 'UTC'
+    time_params["by_receipt_time"] = False
+    return time_params
+
+def iter_query_files(query_dir):
+    """
+    Walk a directory with os.scandir, yielding the .sqy query files
+    scandir avoids the per-entry stat calls os.walk performs
+    """
+    with os.scandir(query_dir) as scanner:
+        for entry in scanner:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_query_files(entry.path)
+            elif entry.name.endswith(QUERY_EXT):
+                yield entry.path
 
 def collect_queries():
     """
     Scoop up a query if a directory, file or a string
-    If a directory then it will process based on .qry extension
+    If a directory then it will process based on .sqy extension
     """
 
     query_list = []
@@ -320,33 +397,98 @@ def collect_queries():
         if os.path.isfile(ARGS.MY_QUERY):
             query_list.append(ARGS.MY_QUERY)
         elif os.path.isdir(ARGS.MY_QUERY):
-            for root, _dirs, files in os.walk(ARGS.MY_QUERY):
-                for file in files:
-                    if os.path.splitext(file)[1] == QUERY_EXT:
-                        fullpath = os.path.join(root, file)
-                        query_list.append(fullpath)
+            query_list.extend(iter_query_files(ARGS.MY_QUERY))
         else:
             query_list.append(ARGS.MY_QUERY)
     else:
         query_list.append(DEFAULT_QUERY)
     return query_list
 
+@functools.lru_cache(maxsize=256)
 def collect_contents(query_item):
     """
     Scoop up a query if a directory, file or a string
     If a directory then it will process based on .sqy extension
+    Results are memoized so each query file is read from disk only once
     """
     query = query_item
     if os.path.exists(query_item):
         with open(query_item, "r", encoding='utf8') as file_object:
             query = file_object.read()
-            file_object.close()
     return query
 
-def run_sumo_query(apisession, query, time_params):
+def build_cache_target(query, time_params, query_target):
+    """
+    Build the cache file name from the query, time range and target
+    """
+    cache_text = f"{query}|{time_params['time_from']}|{time_params['time_to']}|{query_target}"
+    cache_key = hashlib.sha256(cache_text.encode()).hexdigest()
+    return os.path.join(CACHES, cache_key + '.' + ARGS.OUT_FORMAT)
+
+def read_query_cache(cache_target):
+    """
+    Return a reader over the cached output if present and fresh, otherwise None
+    """
+    if ARGS.NOCACHE:
+        return None
+    if not os.path.isfile(cache_target):
+        return None
+    if time.time() - os.path.getmtime(cache_target) > ARGS.CACHETTL:
+        return None
+    return read_cache_chunks(cache_target)
+
+def read_cache_chunks(cache_target):
+    """
+    Yield the cached output one line at a time so a cache hit
+    streams from disk instead of loading the whole file
+    """
+    with open(cache_target, "r", encoding='utf8') as file_object:
+        for cache_line in file_object:
+            yield cache_line.rstrip(EOL_SEP)
+
+def write_query_cache(cache_target, output_chunks):
+    """
+    Write the output chunks into the cache, atomically via a rename
+    Each chunk is yielded back as it is written, so the caller keeps
+    streaming one page at a time while the cache fills alongside
+    """
+    scratch_target = f'{cache_target}.{threading.get_ident()}.partial'
+    with open(scratch_target, "w", encoding='utf8') as file_object:
+        for output_chunk in output_chunks:
+            file_object.write(output_chunk + EOL_SEP)
+            yield output_chunk
+    os.replace(scratch_target, cache_target)
+
+def json_loads(response):
+    """
+    Parse an API response body, using orjson when it is available
+    orjson works on the raw bytes and skips the bytes to str decode
+    """
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return json.loads(response.text)
+
+def json_dumps(data):
+    """
+    Serialize a request payload, using orjson when it is available
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data)
+
+def run_sumo_query(apisession, query, time_params, query_target):
     """
     This runs the Sumo Command, and then saves the output and the status
+    Results are cached on disk by query, time range and target, so a
+    repeated invocation skips the whole search job round trip
     """
+    cache_target = build_cache_target(query, time_params, query_target)
+    cached_chunks = read_query_cache(cache_target)
+    if cached_chunks is not None:
+        if ARGS.VERBOSE > 3:
+            print(f'SUMOQUERY.cachehit: {cache_target}')
+        return cached_chunks
+
     query_job = apisession.search_job(query, time_params)
     query_jobid = query_job["id"]
     if ARGS.VERBOSE > 3:
@@ -359,42 +501,47 @@ def run_sumo_query(apisession, query, time_params):
         print(f'SUMOQUERY.messages: {num_messages}')
         print(f'SUMOQUERY.iterations: {iterations}')
 
-    assembled_output = build_assembled_output(apisession, query_jobid, num_records, iterations)
+    if num_records == 0:
+        output_chunks = iter([ 'NORECORDS' ])
+    else:
+        output_chunks = build_assembled_output(apisession, query_jobid, num_records)
+
+    if not ARGS.NOCACHE:
+        output_chunks = write_query_cache(cache_target, output_chunks)
 
-    return assembled_output
+    return output_chunks
 
-def build_assembled_output(apisession, query_jobid, num_records, iterations):
+def build_assembled_output(apisession, query_jobid, num_records):
     """
-    This assembles the header and output, going through the iterations of the output
+    This assembles the header and output, going through the pages of the output
+    Each page is yielded as its own chunk so callers can stream the
+    results to disk instead of concatenating them in memory
+    The pages are independent, so they are fetched concurrently and
+    yielded in offset order
     """
 
     if num_records == 0:
-        assembled_output = 'NORECORDS'
-    if num_records > 0:
-        total_records = ''
-        for my_counter in range(0, iterations, 1):
-            my_limit = LIMIT
-            my_offset = ( my_limit * my_counter )
-
-            query_records = apisession.search_job_records(query_jobid, my_limit, my_offset)
-
-            header,header_list = build_header(query_records)
-            output = build_body(query_records,header_list)
-            total_records = total_records + output
+        yield 'NORECORDS'
+        return
 
-        assembled_output = EOL_SEP.join([ header , total_records ])
+    fetch_page = functools.partial(apisession.search_job_records, query_jobid, LIMIT)
+    page_offsets = range(0, num_records, LIMIT)
 
-    return assembled_output
+    max_workers = min(len(page_offsets), 8)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        header_list = None
+        for query_records in executor.map(fetch_page, page_offsets):
+            if header_list is None:
+                header, header_list = build_header(query_records)
+                yield header
+            yield build_body(query_records, header_list)
 
 def build_header(query_records):
     """
     This builds the header of the output from the results of query_records
     """
 
-    header_list = []
-    dataframe = pandas.DataFrame.from_records(query_records['fields'])
-    myfielddf = pandas.DataFrame(dataframe, columns=['name'])
-    header_list = myfielddf.to_csv(header=None, index=False).strip('\n').split('\n')
+    header_list = [ field['name'] for field in query_records['fields'] ]
     header = MY_SEP.join(header_list)
 
     return header, header_list
@@ -402,16 +549,18 @@ def build_header(query_records):
 def build_body(query_records, header_list):
     """
     This builds the body of the output from the results of query_records
-    """
-    record_body_list = []
-    for record in query_records["records"]:
-        record_line_list = []
-        for header in header_list:
-            recordlist = str(record["map"][header]).replace(',','|')
-            record_line_list.append(recordlist)
-            record_line = MY_SEP.join(record_line_list)
-        record_body_list.append(record_line)
-    output = EOL_SEP.join(record_body_list)
+    The records are shaped and joined inside pandas rather than in a
+    nested python loop, so large pages format in C speed
+    Cells containing the separator are quoted by the CSV writer, so
+    their contents no longer need to be rewritten with pipes
+    pandas is imported here so startup and help do not pay its cost
+    """
+    import pandas
+    record_maps = [ record["map"] for record in query_records["records"] ]
+    dataframe = pandas.DataFrame.from_records(record_maps, columns=header_list)
+    dataframe = dataframe.apply(lambda column: column.astype(str))
+    output = dataframe.to_csv(sep=MY_SEP, header=False, index=False, \
+        lineterminator=EOL_SEP, quoting=csv.QUOTE_MINIMAL).rstrip(EOL_SEP)
 
     return output
 
@@ -422,30 +571,29 @@ class SumoApiClient():
     The class includes the HTTP methods, cmdlets, and init methods
     """
 
-    def __init__(self, access_id, access_key, endpoint=None, cookie_file='cookies.txt'):
+    session_cache = {}
+
+    def __init__(self, access_id, access_key, endpoint=None):
         """
         Initializes the Sumo Logic object
         """
 
         self.retry_strategy = Retry(
             total=10,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "OPTIONS"]
+            backoff_factor=1.0,
+            status_forcelist=[408, 429, 500, 502, 503, 504],
+            allowed_methods=["HEAD", "GET", "OPTIONS", "POST"]
         )
-        self.adapter = HTTPAdapter(max_retries=self.retry_strategy)
+        self.adapter = HTTPAdapter(pool_connections=50, pool_maxsize=50, \
+            max_retries=self.retry_strategy)
 
-        self.session = requests.Session()
+        self.session = self._build_session(access_id, access_key)
 
-        self.session.mount("https://", self.adapter)
-        self.session.mount("http://", self.adapter)
-
-        self.session.auth = (access_id, access_key)
-        self.session.headers = {'content-type': 'application/json', \
-            'accept': 'application/json'}
-        cookiejar = http.cookiejar.FileCookieJar(cookie_file)
-        self.session.cookies = cookiejar
         if endpoint is None:
-            self.endpoint = self._get_endpoint()
+            endpoint_key = (access_id, 'api.sumologic.com')
+            if endpoint_key not in ENDPOINT_CACHE:
+                ENDPOINT_CACHE[endpoint_key] = self._get_endpoint()
+            self.endpoint = ENDPOINT_CACHE[endpoint_key]
         elif len(endpoint) < 3:
             self.endpoint = 'https://api.' + endpoint + '.sumologic.com/api'
         else:
@@ -453,6 +601,24 @@ class SumoApiClient():
         if self.endpoint[-1:] == "/":
             raise Exception("Endpoint should not end with a slash character")
 
+    def _build_session(self, access_id, access_key):
+        """
+        Build the shared session for the given credentials, reusing any
+        existing one so every client keeps the same keep-alive pool warm
+        """
+        session_key = (access_id, access_key)
+        session = SumoApiClient.session_cache.get(session_key)
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", self.adapter)
+            session.mount("http://", self.adapter)
+            session.auth = (access_id, access_key)
+            session.headers = {'content-type': 'application/json', \
+                'accept': 'application/json'}
+            session.cookies = RequestsCookieJar()
+            SumoApiClient.session_cache[session_key] = session
+        return session
+
     def _get_endpoint(self):
         """
         SumoLogic REST API endpoint changes based on the geo location of the client.
@@ -463,49 +629,42 @@ class SumoApiClient():
         endpoint = self.response.url.replace('/v1/collectors', '')
         return endpoint
 
-    def delete(self, method, params=None, headers=None, data=None):
+    def _request(self, verb, method, **kwargs):
         """
-        Defines a Sumo Logic Delete operation
+        Defines a Sumo Logic operation against the endpoint
+        Any non 2xx status raises with the response text as the reason
         """
-        response = self.session.delete(self.endpoint + method, \
-            params=params, headers=headers, data=data)
-        if response.status_code != 200:
+        response = self.session.request(verb, self.endpoint + method, **kwargs)
+        if not response.ok:
             response.reason = response.text
         response.raise_for_status()
         return response
 
+    def delete(self, method, params=None, headers=None, data=None):
+        """
+        Defines a Sumo Logic Delete operation
+        """
+        return self._request('DELETE', method, params=params, headers=headers, data=data)
+
     def get(self, method, params=None, headers=None):
         """
         Defines a Sumo Logic Get operation
         """
-        response = self.session.get(self.endpoint + method, \
-            params=params, headers=headers)
-        if response.status_code != 200:
-            response.reason = response.text
-        response.raise_for_status()
-        return response
+        return self._request('GET', method, params=params, headers=headers)
 
     def post(self, method, data, headers=None, params=None):
         """
         Defines a Sumo Logic Post operation
         """
-        response = self.session.post(self.endpoint + method, \
-            data=json.dumps(data), headers=headers, params=params)
-        if response.status_code != 200:
-            response.reason = response.text
-        response.raise_for_status()
-        return response
+        return self._request('POST', method, \
+            data=json_dumps(data), headers=headers, params=params)
 
     def put(self, method, data, headers=None, params=None):
         """
         Defines a Sumo Logic Put operation
         """
-        response = self.session.put(self.endpoint + method, \
-            data=json.dumps(data), headers=headers, params=params)
-        if response.status_code != 200:
-            response.reason = response.text
-        response.raise_for_status()
-        return response
+        return self._request('PUT', method, \
+            data=json_dumps(data), headers=headers, params=params)
 
 ### class ###
 ### methods ###
@@ -529,22 +688,23 @@ class SumoApiClient():
             'byReceiptTime': str(by_receipt_time)
         }
         response = self.post('/v1/search/jobs', data)
-        return json.loads(response.text)
+        return json_loads(response)
 
     def search_job_status(self, search_jobid):
         """
         Find out search job status
         """
         response = self.get('/v1/search/jobs/' + str(search_jobid))
-        return json.loads(response.text)
+        return json_loads(response)
 
     def calculate_and_fetch_records(self, query_jobid, num_records):
         """
         Calculate and return records in chunks based on LIMIT
         """
+        if num_records == 0:
+            return []
         job_records = []
         iterations = num_records // LIMIT + 1
-        time.sleep(random.randint(0,MY_SLEEP))
         for iteration in range(1, iterations + 1):
             records = self.search_job_records(query_jobid, limit=LIMIT,
                                               offset=((iteration - 1) * LIMIT))
@@ -561,14 +721,15 @@ class SumoApiClient():
         query_status = query_output['state']
         num_messages = query_output['messageCount']
         num_records = query_output['recordCount']
-        time.sleep(random.randint(0,MY_SLEEP))
         iterations = 1
+        delay = 0.1
         while query_status == 'GATHERING RESULTS':
+            time.sleep(delay)
+            delay = min(delay * 1.5, MY_SLEEP)
             query_output = self.search_job_status(query_jobid)
             query_status = query_output['state']
             num_messages = query_output['messageCount']
             num_records = query_output['recordCount']
-            time.sleep(random.randint(0,MY_SLEEP))
             iterations += 1
         return (query_status, num_messages, num_records, iterations)
 
@@ -576,10 +737,11 @@ class SumoApiClient():
         """
         Calculate and return messages in chunks based on LIMIT
         """
+        if num_messages == 0:
+            return []
         job_messages = []
         iterations = num_messages // LIMIT + 1
         for iteration in range(1, iterations + 1):
-            time.sleep(random.randint(0,MY_SLEEP))
             records = self.search_job_records(query_jobid, limit=LIMIT,
                                               offset=((iteration - 1) * LIMIT))
             for record in records['records']:
@@ -590,19 +752,17 @@ class SumoApiClient():
         """
         Query the job messages of a search job
         """
-        time.sleep(random.randint(0,MY_SLEEP))
         params = {'limit': limit, 'offset': offset}
         response = self.get('/v1/search/jobs/' + str(query_jobid) + '/messages', params)
-        return json.loads(response.text)
+        return json_loads(response)
 
     def search_job_records(self, query_jobid, limit=None, offset=0):
         """
         Query the job records of a search job
         """
-        time.sleep(random.randint(0,MY_SLEEP))
         params = {'limit': limit, 'offset': offset}
         response = self.get('/v1/search/jobs/' + str(query_jobid) + '/records', params)
-        return json.loads(response.text)
+        return json_loads(response)
 
     def delete_search_job(self, query_jobid):
         """